@@ -0,0 +1,273 @@
+#!/usr/bin/python3
+import numpy as np
+try:
+    from numba import get_num_threads, get_thread_id, njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    # Without Numba the same kernels run as ordinary Python loops on a single thread
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda function: function)
+
+    prange = range
+
+    def get_num_threads():
+        return 1
+
+    def get_thread_id():
+        return 0
+
+# Width of the column tiles swept by both SpGEMM passes; 8192 int64 accumulator
+# entries (64 KiB) plus the matching marker entries fit in a typical L2 cache
+SPGEMM_TILE = 8192
+
+@njit(cache=True)
+def _next_tile(a_indices, a_start, a_end, b_indptr, b_indices, cursor, tile):
+
+    """
+    Finds the first column tile still touched by a row of the product.
+
+    cursor holds, for every entry p of the row of A, the next unread position in the row
+    a_indices[p] of B. Only the tiles that actually contain a column are ever returned,
+    so sparse rows of very wide matrices skip the empty tiles entirely.
+
+    Returns:
+        int: Start column of the tile, or -1 if every row of B has been consumed.
+    """
+
+    next_col = -1
+    for p in range(a_start, a_end):
+        q = cursor[p - a_start]
+        if q < b_indptr[a_indices[p] + 1]:
+            j = b_indices[q]
+            if next_col < 0 or j < next_col:
+                next_col = j
+    if next_col < 0:
+        return -1
+    return next_col - next_col % tile
+
+@njit(parallel=True, cache=True)
+def _spgemm_symbolic(a_indptr, a_indices, b_indptr, b_indices, marker, cursors, n_cols, tile):
+
+    """
+    Counts the distinct columns of every row of the product of two CSR matrices.
+
+    Rows are distributed over threads; each thread marks visited columns of the current
+    tile in its own row of marker, stamped with the row and tile so it is never cleared.
+    """
+
+    n_rows = len(a_indptr) - 1
+    n_tiles = (n_cols + tile - 1) // tile
+    row_nnz = np.zeros(n_rows, dtype=np.int64)
+    for i in prange(n_rows):
+        thread = get_thread_id()
+        seen = marker[thread]
+        cursor = cursors[thread]
+        a_start, a_end = a_indptr[i], a_indptr[i + 1]
+        for p in range(a_start, a_end):
+            cursor[p - a_start] = b_indptr[a_indices[p]]
+        count = 0
+        tile_start = _next_tile(a_indices, a_start, a_end, b_indptr, b_indices, cursor, tile)
+        while tile_start >= 0:
+            tile_end = tile_start + tile
+            stamp = i * n_tiles + tile_start // tile
+            for p in range(a_start, a_end):
+                q = cursor[p - a_start]
+                end = b_indptr[a_indices[p] + 1]
+                while q < end and b_indices[q] < tile_end:
+                    offset = b_indices[q] - tile_start
+                    if seen[offset] != stamp:
+                        seen[offset] = stamp
+                        count += 1
+                    q += 1
+                cursor[p - a_start] = q
+            tile_start = _next_tile(a_indices, a_start, a_end, b_indptr, b_indices, cursor, tile)
+        row_nnz[i] = count
+    return row_nnz
+
+@njit(parallel=True, cache=True)
+def _spgemm_numeric(a_indptr, a_indices, a_data, b_indptr, b_indices, b_data,
+                    c_indptr, c_indices, c_data, accumulator, marker, cursors, n_cols, tile):
+
+    """
+    Fills the slices of c_indices and c_data reserved by the symbolic pass.
+
+    The output columns are processed in tiles of the given width, so the calling thread's
+    accumulator and marker rows only need tile entries and stay cache resident for wide matrices.
+    Per-entry cursors into the rows of B advance through the row one touched tile at a time.
+    Each tile of a row is sorted by column and appended to the row's slice, dropping entries
+    that cancel to zero.
+
+    Returns:
+        np.ndarray: Number of nonzeros actually written for every row.
+    """
+
+    n_rows = len(a_indptr) - 1
+    n_tiles = (n_cols + tile - 1) // tile
+    row_nnz = np.zeros(n_rows, dtype=np.int64)
+    for i in prange(n_rows):
+        thread = get_thread_id()
+        acc = accumulator[thread]
+        seen = marker[thread]
+        cursor = cursors[thread]
+        a_start, a_end = a_indptr[i], a_indptr[i + 1]
+        for p in range(a_start, a_end):
+            cursor[p - a_start] = b_indptr[a_indices[p]]
+        out = c_indptr[i]
+        tile_start = _next_tile(a_indices, a_start, a_end, b_indptr, b_indices, cursor, tile)
+        while tile_start >= 0:
+            tile_end = tile_start + tile
+            stamp = i * n_tiles + tile_start // tile
+            end = out
+            for p in range(a_start, a_end):
+                value = np.int64(a_data[p])
+                q = cursor[p - a_start]
+                b_end = b_indptr[a_indices[p] + 1]
+                # Rows of B are sorted by column, so nothing past the tile follows
+                while q < b_end and b_indices[q] < tile_end:
+                    j = b_indices[q]
+                    offset = j - tile_start
+                    if seen[offset] != stamp:
+                        seen[offset] = stamp
+                        c_indices[end] = j
+                        end += 1
+                    acc[offset] += value * b_data[q]
+                    q += 1
+                cursor[p - a_start] = q
+            c_indices[out:end].sort()
+            # Compact the tile and clear the accumulator entries it used for the next tile
+            written = out
+            for q in range(out, end):
+                j = c_indices[q]
+                offset = j - tile_start
+                if acc[offset] != 0:
+                    c_indices[written] = j
+                    c_data[written] = acc[offset]
+                    written += 1
+                acc[offset] = 0
+            out = written
+            tile_start = _next_tile(a_indices, a_start, a_end, b_indptr, b_indices, cursor, tile)
+        row_nnz[i] = out - c_indptr[i]
+    return row_nnz
+
+@njit(parallel=True, cache=True)
+def _compact_rows(indptr, indices, data, row_nnz):
+
+    """
+    Packs the first row_nnz[i] entries of every row of a CSR matrix into contiguous arrays.
+    """
+
+    n_rows = len(indptr) - 1
+    packed_indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    packed_indptr[1:] = np.cumsum(row_nnz)
+    packed_indices = np.empty(packed_indptr[n_rows], dtype=indices.dtype)
+    packed_data = np.empty(packed_indptr[n_rows], dtype=data.dtype)
+    for i in prange(n_rows):
+        source = indptr[i]
+        target = packed_indptr[i]
+        for q in range(row_nnz[i]):
+            packed_indices[target + q] = indices[source + q]
+            packed_data[target + q] = data[source + q]
+    return packed_indptr, packed_indices, packed_data
+
+def csr_spgemm(a_indptr, a_indices, a_data, b_indptr, b_indices, b_data, n_cols):
+
+    """
+    Multiplies two CSR matrices with Gustavson's row-by-row algorithm.
+
+    A symbolic pass sizes every result row so that the numeric pass can then fill the rows
+    in parallel. Every thread owns one row of a (threads, SPGEMM_TILE) accumulator and marker
+    workspace, and both passes sweep the output columns one tile at a time, visiting only
+    the tiles a row actually touches.
+    Columns within each result row are sorted, and entries that cancel to zero are dropped.
+
+    Args:
+        a_indptr, a_indices, a_data: CSR arrays of the left operand.
+        b_indptr, b_indices, b_data: CSR arrays of the right operand.
+        n_cols (int): Number of columns of the right operand.
+
+    Returns:
+        tuple: (indptr, indices, data) of the product.
+    """
+
+    n_rows = len(a_indptr) - 1
+    threads = get_num_threads()
+    tile = max(min(SPGEMM_TILE, n_cols), 1)
+    marker = np.full((threads, tile), -1, dtype=np.int64)
+    cursors = np.empty((threads, max(int(np.diff(a_indptr).max(initial=0)), 1)), dtype=np.int64)
+    c_indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(_spgemm_symbolic(a_indptr, a_indices, b_indptr, b_indices, marker, cursors, n_cols, tile),
+              out=c_indptr[1:])
+
+    c_indices = np.empty(c_indptr[n_rows], dtype=b_indices.dtype)
+    c_data = np.empty(c_indptr[n_rows], dtype=np.int64)
+    accumulator = np.zeros((threads, tile), dtype=np.int64)
+    marker.fill(-1)
+    row_nnz = _spgemm_numeric(a_indptr, a_indices, a_data, b_indptr, b_indices, b_data,
+                              c_indptr, c_indices, c_data, accumulator, marker, cursors, n_cols, tile)
+    if row_nnz.sum() == c_indptr[n_rows]:
+        return c_indptr, c_indices, c_data
+    return _compact_rows(c_indptr, c_indices, c_data, row_nnz)
+
+@njit(cache=True)
+def csr_add(a_indptr, a_indices, a_data, b_indptr, b_indices, b_data, sign):
+
+    """
+    Computes A + sign * B for two CSR matrices of the same shape in a single merge pass.
+
+    Every row is a two-pointer merge of the two sorted rows, written straight into output
+    arrays preallocated for nnz(A) + nnz(B) entries and trimmed at the end.
+    Entries that cancel to zero are dropped.
+
+    Args:
+        a_indptr, a_indices, a_data: CSR arrays of the left operand.
+        b_indptr, b_indices, b_data: CSR arrays of the right operand.
+        sign (int): 1 for addition, -1 for subtraction.
+
+    Returns:
+        tuple: (indptr, indices, data) of the result.
+    """
+
+    # Promote up front so narrow value dtypes cannot wrap, also when running without Numba
+    sign = np.int64(sign)
+    n_rows = len(a_indptr) - 1
+    capacity = a_indptr[n_rows] + b_indptr[n_rows]
+    c_indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    c_indices = np.empty(capacity, dtype=a_indices.dtype)
+    c_data = np.empty(capacity, dtype=np.int64)
+    out = 0
+    for r in range(n_rows):
+        i, a_end = a_indptr[r], a_indptr[r + 1]
+        j, b_end = b_indptr[r], b_indptr[r + 1]
+        while i < a_end and j < b_end:
+            if a_indices[i] < b_indices[j]:
+                c_indices[out] = a_indices[i]
+                c_data[out] = a_data[i]
+                i += 1
+                out += 1
+            elif a_indices[i] > b_indices[j]:
+                c_indices[out] = b_indices[j]
+                c_data[out] = sign * b_data[j]
+                j += 1
+                out += 1
+            else:
+                value = a_data[i] + sign * b_data[j]
+                if value != 0:
+                    c_indices[out] = a_indices[i]
+                    c_data[out] = value
+                    out += 1
+                i += 1
+                j += 1
+        while i < a_end:
+            c_indices[out] = a_indices[i]
+            c_data[out] = a_data[i]
+            i += 1
+            out += 1
+        while j < b_end:
+            c_indices[out] = b_indices[j]
+            c_data[out] = sign * b_data[j]
+            j += 1
+            out += 1
+        c_indptr[r + 1] = out
+    return c_indptr, c_indices[:out].copy(), c_data[:out].copy()
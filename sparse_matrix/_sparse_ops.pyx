@@ -0,0 +1,170 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+import numpy as np
+from libc.stdint cimport int64_t
+from libc.stdlib cimport qsort
+
+cdef int _compare(const void *a, const void *b) noexcept nogil:
+    cdef int64_t x = (<const int64_t *> a)[0]
+    cdef int64_t y = (<const int64_t *> b)[0]
+    return (x > y) - (x < y)
+
+def csr_spgemm(a_indptr, a_indices, a_data, b_indptr, b_indices, b_data, n_cols):
+
+    """
+    Multiplies two CSR matrices with Gustavson's row-by-row algorithm.
+
+    Compiled counterpart of _kernels.csr_spgemm for environments without Numba.
+    The operands are converted to int64 once and the loops run without the GIL.
+
+    Args:
+        a_indptr, a_indices, a_data: CSR arrays of the left operand.
+        b_indptr, b_indices, b_data: CSR arrays of the right operand.
+        n_cols (int): Number of columns of the right operand.
+
+    Returns:
+        tuple: (indptr, indices, data) of the product.
+    """
+
+    return _spgemm(np.ascontiguousarray(a_indptr, dtype=np.int64),
+                   np.ascontiguousarray(a_indices, dtype=np.int64),
+                   np.ascontiguousarray(a_data, dtype=np.int64),
+                   np.ascontiguousarray(b_indptr, dtype=np.int64),
+                   np.ascontiguousarray(b_indices, dtype=np.int64),
+                   np.ascontiguousarray(b_data, dtype=np.int64),
+                   n_cols)
+
+def csr_add(a_indptr, a_indices, a_data, b_indptr, b_indices, b_data, sign):
+
+    """
+    Computes A + sign * B for two CSR matrices of the same shape in a single merge pass.
+
+    Compiled counterpart of _kernels.csr_add for environments without Numba.
+
+    Args:
+        a_indptr, a_indices, a_data: CSR arrays of the left operand.
+        b_indptr, b_indices, b_data: CSR arrays of the right operand.
+        sign (int): 1 for addition, -1 for subtraction.
+
+    Returns:
+        tuple: (indptr, indices, data) of the result.
+    """
+
+    return _add(np.ascontiguousarray(a_indptr, dtype=np.int64),
+                np.ascontiguousarray(a_indices, dtype=np.int64),
+                np.ascontiguousarray(a_data, dtype=np.int64),
+                np.ascontiguousarray(b_indptr, dtype=np.int64),
+                np.ascontiguousarray(b_indices, dtype=np.int64),
+                np.ascontiguousarray(b_data, dtype=np.int64),
+                sign)
+
+cdef tuple _spgemm(const int64_t[::1] a_indptr, const int64_t[::1] a_indices, const int64_t[::1] a_data,
+                   const int64_t[::1] b_indptr, const int64_t[::1] b_indices, const int64_t[::1] b_data,
+                   Py_ssize_t n_cols):
+    cdef Py_ssize_t n_rows = a_indptr.shape[0] - 1
+    cdef Py_ssize_t i, p, q, k, j, start, end, count, out
+    cdef int64_t value
+
+    marker = np.full(n_cols, -1, dtype=np.int64)
+    cdef int64_t[::1] seen = marker
+    bounds = np.zeros(n_rows + 1, dtype=np.int64)
+    cdef int64_t[::1] row_bounds = bounds
+    with nogil:
+        for i in range(n_rows):
+            count = 0
+            for p in range(a_indptr[i], a_indptr[i + 1]):
+                k = a_indices[p]
+                for q in range(b_indptr[k], b_indptr[k + 1]):
+                    j = b_indices[q]
+                    if seen[j] != i:
+                        seen[j] = i
+                        count += 1
+            row_bounds[i + 1] = row_bounds[i] + count
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    indices = np.empty(row_bounds[n_rows], dtype=np.int64)
+    data = np.empty(row_bounds[n_rows], dtype=np.int64)
+    accumulator = np.zeros(n_cols, dtype=np.int64)
+    cdef int64_t[::1] c_indptr = indptr
+    cdef int64_t[::1] c_indices = indices
+    cdef int64_t[::1] c_data = data
+    cdef int64_t[::1] acc = accumulator
+    seen[:] = -1
+    out = 0
+    with nogil:
+        for i in range(n_rows):
+            start = row_bounds[i]
+            end = start
+            for p in range(a_indptr[i], a_indptr[i + 1]):
+                k = a_indices[p]
+                value = a_data[p]
+                for q in range(b_indptr[k], b_indptr[k + 1]):
+                    j = b_indices[q]
+                    if seen[j] != i:
+                        seen[j] = i
+                        c_indices[end] = j
+                        end += 1
+                    acc[j] += value * b_data[q]
+            if end > start:
+                qsort(&c_indices[start], end - start, sizeof(int64_t), _compare)
+            # Compact in place; the write cursor never overtakes the row being read
+            for q in range(start, end):
+                j = c_indices[q]
+                if acc[j] != 0:
+                    c_indices[out] = j
+                    c_data[out] = acc[j]
+                    out += 1
+                acc[j] = 0
+            c_indptr[i + 1] = out
+    if out == row_bounds[n_rows]:
+        return indptr, indices, data
+    return indptr, indices[:out].copy(), data[:out].copy()
+
+cdef tuple _add(const int64_t[::1] a_indptr, const int64_t[::1] a_indices, const int64_t[::1] a_data,
+                const int64_t[::1] b_indptr, const int64_t[::1] b_indices, const int64_t[::1] b_data,
+                int64_t sign):
+    cdef Py_ssize_t n_rows = a_indptr.shape[0] - 1
+    cdef Py_ssize_t r, i, j, a_end, b_end, out
+    cdef int64_t value
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    indices = np.empty(a_indptr[n_rows] + b_indptr[n_rows], dtype=np.int64)
+    data = np.empty(a_indptr[n_rows] + b_indptr[n_rows], dtype=np.int64)
+    cdef int64_t[::1] c_indptr = indptr
+    cdef int64_t[::1] c_indices = indices
+    cdef int64_t[::1] c_data = data
+    out = 0
+    with nogil:
+        for r in range(n_rows):
+            i, a_end = a_indptr[r], a_indptr[r + 1]
+            j, b_end = b_indptr[r], b_indptr[r + 1]
+            while i < a_end and j < b_end:
+                if a_indices[i] < b_indices[j]:
+                    c_indices[out] = a_indices[i]
+                    c_data[out] = a_data[i]
+                    i += 1
+                    out += 1
+                elif a_indices[i] > b_indices[j]:
+                    c_indices[out] = b_indices[j]
+                    c_data[out] = sign * b_data[j]
+                    j += 1
+                    out += 1
+                else:
+                    value = a_data[i] + sign * b_data[j]
+                    if value != 0:
+                        c_indices[out] = a_indices[i]
+                        c_data[out] = value
+                        out += 1
+                    i += 1
+                    j += 1
+            while i < a_end:
+                c_indices[out] = a_indices[i]
+                c_data[out] = a_data[i]
+                i += 1
+                out += 1
+            while j < b_end:
+                c_indices[out] = b_indices[j]
+                c_data[out] = sign * b_data[j]
+                j += 1
+                out += 1
+            c_indptr[r + 1] = out
+    return indptr, indices[:out].copy(), data[:out].copy()
@@ -1,23 +1,103 @@
 #!/usr/bin/python3
+import logging
 import os
+import sys
 
-class Node:
+import numpy as np
+
+# Prefer the parallel, tiled Numba kernels; without Numba, use the serial compiled kernels
+# if they were built with setup.py, and otherwise the Numba kernels running as plain Python
+from _kernels import NUMBA_AVAILABLE, csr_add, csr_spgemm
+if not NUMBA_AVAILABLE:
+    try:
+        from _sparse_ops import csr_add, csr_spgemm
+    except ImportError:
+        pass
+
+logger = logging.getLogger(__name__)
+
+def _index_dtype(num_rows, num_cols):
     
     """
-    Represents a node in the sparse matrix linked list.
-    Each node contains the row, column, and value of a non-zero element.
+    Returns the integer dtype used for the row and column indices of a matrix of the given shape.
     """
     
-    def __init__(self, row, col, value):
-        self.row = row
-        self.col = col
-        self.value = value
-        self.next = None
+    return np.int64 if max(num_rows, num_cols) > 2**31 else np.int32
+
+def _value_dtype(values):
+    
+    """
+    Returns the narrowest signed integer dtype that holds every value in the array.
+    """
+    
+    if len(values) == 0:
+        return np.int64
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+def _pack_keys(rows, cols):
+    
+    """
+    Packs row and column indices into uint64 keys (row << 32 | col) that order like (row, col) pairs.
+    """
+    
+    return (rows.astype(np.uint64) << np.uint64(32)) | cols.astype(np.uint64)
+
+def _check_triples(lines, count):
+    
+    """
+    Raises ValueError unless each of the count newline-separated lines holds exactly two commas.
+    
+    The commas are attributed to their lines with one binary search over the newline positions,
+    so the check stays vectorized like the parse that follows it.
+    """
+    
+    text = np.frombuffer(lines.encode(), dtype=np.uint8)
+    newlines = np.flatnonzero(text == ord('\n'))
+    commas = np.flatnonzero(text == ord(','))
+    per_line = np.bincount(np.searchsorted(newlines, commas), minlength=count)
+    bad = np.flatnonzero(per_line != 2)
+    if len(bad):
+        line = lines.split('\n')[bad[0]]
+        raise ValueError(f"expected a (row, col, value) triple, got {line}")
+
+def _check_int64(elements, values):
+    
+    """
+    Raises ValueError if a number of the comma-separated elements was clamped while parsing it into values.
+    
+    np.fromstring saturates numbers outside int64 to its limits, so only fields parsed to a limit
+    are compared against their source text, which keeps the check free for ordinary files.
+    """
+    
+    info = np.iinfo(np.int64)
+    saturated = np.flatnonzero((values == info.min) | (values == info.max))
+    if len(saturated):
+        fields = elements.split(',')
+        for index in saturated:
+            if int(fields[index]) != values[index]:
+                raise ValueError(f"{fields[index].strip()} does not fit in a 64-bit integer")
+
+def _fits_packed_keys(index_dtype):
+    
+    """
+    Tells whether every index of the given dtype fits in 32 bits of a packed key.
+    """
+    
+    return np.iinfo(index_dtype).max < 2**32
 
 class SparseMatrix:
     
     """
-    Represents a sparse matrix using a linked list structure.
+    Represents a sparse matrix in coordinate (COO) form.
+    The non-zero elements are kept in three parallel NumPy arrays (rows, cols, vals),
+    sorted by row and then by column. The arithmetic methods work on the equivalent
+    compressed sparse row (CSR) arrays, which are built on first use and cached until
+    the elements change.
     This class provides methods for matrix operations such as addition, subtraction, and multiplication.
     """
     
@@ -32,9 +112,14 @@ class SparseMatrix:
             num_cols (int, optional): Number of columns in the matrix.
         """
         
-        self.head = None
+        self.rows = np.empty(0, dtype=np.int32)
+        self.cols = np.empty(0, dtype=np.int32)
+        self.vals = np.empty(0, dtype=np.int64)
         self.num_rows = num_rows
         self.num_cols = num_cols
+        self._csr = None
+        self._pending = {}
+        self._keys = None
         if matrix_file_path:
             self.load_matrix(matrix_file_path)
 
@@ -44,61 +129,236 @@ class SparseMatrix:
         Loads matrix data from a file.
         """
         
-        print(f"Attempting to load matrix from: {matrix_file_path}")
+        logger.debug("Attempting to load matrix from: %s", matrix_file_path)
         try:
             with open(matrix_file_path, 'r') as file:
-                lines = file.readlines()
+                lines = file.read().split('\n', 2)
                 # Parse matrix dimensions
                 self.num_rows = int(lines[0].split('=')[1].strip())
                 self.num_cols = int(lines[1].split('=')[1].strip())
-                # Parse and set matrix elements
-                print(f"Matrix dimensions: {self.num_rows} x {self.num_cols}")
-                for line in lines[2:]:
-                    line = line.strip()
-                    if line and line.startswith("(") and line.endswith(")"):
-                        row, col, value = map(int, line[1:-1].split(','))
-                        self.set_element(row, col, value)
-                    else:
-                        print(f"Skipping invalid line: {line}")
-            print("Matrix loaded successfully")
+                logger.debug("Matrix dimensions: %d x %d", self.num_rows, self.num_cols)
+                body = lines[2].removesuffix('\n') if len(lines) > 2 else ''
+                count = body.count('\n') + 1 if body else 0
+                # When every line is exactly one parenthesized element, the whole body is
+                # turned into a single comma-separated list and parsed in one call
+                if not (body.startswith('(') and body.endswith(')')
+                        and body.count('(') == body.count(')') == count
+                        and body.count(')\n(') == count - 1):
+                    valid = []
+                    skipped = 0
+                    for line in body.splitlines():
+                        line = line.strip()
+                        if line and line.startswith("(") and line.endswith(")"):
+                            valid.append(line)
+                        else:
+                            skipped += 1
+                    if skipped:
+                        logger.warning("Skipped %d invalid lines in %s", skipped, matrix_file_path)
+                    body = '\n'.join(valid)
+                    count = len(valid)
+                # The joined list no longer shows where a line ends, so the fields are counted per line first
+                _check_triples(body, count)
+                elements = body[1:-1].replace(')\n(', ',')
+                values = np.fromstring(elements, dtype=np.int64, sep=',')
+                if len(values) != 3 * count:
+                    raise ValueError("every element must be a (row, col, value) triple")
+                _check_int64(elements, values)
+                rows, cols, vals = values.reshape(-1, 3).T
+                if len(values) and min(rows.min(), cols.min()) < 0:
+                    raise ValueError("element indices must not be negative")
+                # The declared dimensions stay authoritative; elements past them are kept and saved,
+                # but take no part in arithmetic
+                max_row, max_col = int(rows.max(initial=0)), int(cols.max(initial=0))
+                if max_row >= self.num_rows or max_col >= self.num_cols:
+                    outside = np.count_nonzero((rows >= self.num_rows) | (cols >= self.num_cols))
+                    logger.warning("Kept %d elements outside the declared %d x %d shape of %s",
+                                   outside, self.num_rows, self.num_cols, matrix_file_path)
+                self._pending = {}
+                # Indices and values are stored in the narrowest dtypes that fit; the kernels accumulate in int64
+                index_dtype = _index_dtype(max(self.num_rows, max_row + 1), max(self.num_cols, max_col + 1))
+                self._set_arrays(rows.astype(index_dtype), cols.astype(index_dtype), vals.astype(_value_dtype(vals)))
+            logger.debug("Matrix loaded successfully")
         except FileNotFoundError:
-            print(f"Error: File not found at {matrix_file_path}")
+            logger.error("File not found at %s", matrix_file_path)
         except ValueError as e:
-            print(f"Error parsing file: {e}")
+            logger.error("Error parsing file %s: %s", matrix_file_path, e)
         except Exception as e:
-            print(f"Unexpected error: {type(e).__name__}: {e}")
+            logger.error("Unexpected error loading %s: %s: %s", matrix_file_path, type(e).__name__, e)
+
+    def _set_arrays(self, rows, cols, vals):
+        
+        """
+        Stores the given coordinate arrays, sorted by row and column.
+        
+        When a position occurs more than once, the last occurrence wins,
+        and explicit zeros are dropped.
+        """
+        
+        last = np.ones(len(vals), dtype=bool)
+        if _fits_packed_keys(np.result_type(rows, cols)):
+            # Sorting the packed keys is a single integer sort instead of a two-key lexsort
+            keys = _pack_keys(rows, cols)
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            last[:-1] = keys[1:] != keys[:-1]
+        else:
+            keys = None
+            order = np.lexsort((cols, rows))
+            sorted_rows, sorted_cols = rows[order], cols[order]
+            last[:-1] = (sorted_rows[1:] != sorted_rows[:-1]) | (sorted_cols[1:] != sorted_cols[:-1])
+        # Both sorts are stable, so the last entry of each run of equal positions is the latest write
+        vals = vals[order]
+        keep = last & (vals != 0)
+        selected = order[keep]
+        self._set_sorted(rows[selected], cols[selected], vals[keep])
+        if keys is not None:
+            self._keys = keys[keep]
+
+    def _set_sorted(self, rows, cols, vals):
+        
+        """
+        Stores coordinate arrays that are already sorted by row and column, unique and nonzero.
+        """
+        
+        self.rows = rows
+        self.cols = cols
+        self.vals = vals
+        self._keys = None
+        self._csr = None
+
+    def _as_csr(self):
+        
+        """
+        Returns the (indptr, indices, data) CSR arrays of the matrix, building them if needed.
+        """
+        
+        self._finalize()
+        if self._csr is None:
+            self._csr = self._build_csr()
+        return self._csr
+
+    def _in_shape(self):
+        
+        """
+        Returns the (rows, cols, vals) arrays of the elements that lie inside the declared shape.
+        
+        The stored arrays are returned as-is when every element lies inside it.
+        """
+        
+        if len(self.vals) == 0 or (self.rows[-1] < self.num_rows and self.cols.max() < self.num_cols):
+            return self.rows, self.cols, self.vals
+        inside = (self.rows < self.num_rows) & (self.cols < self.num_cols)
+        return self.rows[inside], self.cols[inside], self.vals[inside]
+
+    def _build_csr(self):
+        
+        """
+        Builds the CSR arrays from the elements inside the declared shape.
+        
+        The row pointers come from a counting pass over the row indices followed by a prefix sum.
+        Because the coordinate arrays are kept sorted by row and column, the scatter pass of the
+        usual counting-sort conversion is the identity, so cols and vals are used as-is.
+        """
+        
+        rows, cols, vals = self._in_shape()
+        counts = np.bincount(rows, minlength=self.num_rows)
+        indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return indptr, cols, vals
+
+    @classmethod
+    def _from_csr(cls, indptr, indices, data, num_rows, num_cols):
+        
+        """
+        Creates a matrix directly from CSR arrays, whose rows must already be sorted by column
+        and hold no zeros, without going through set_element or any sort.
+        
+        The CSR arrays are cached as given and the coordinate arrays are derived from them.
+        """
+        
+        matrix = cls(num_rows=num_rows, num_cols=num_cols)
+        index_dtype = _index_dtype(num_rows, num_cols)
+        matrix.cols = indices.astype(index_dtype, copy=False)
+        matrix.vals = data
+        matrix.rows = np.repeat(np.arange(len(indptr) - 1, dtype=index_dtype), np.diff(indptr))
+        matrix._csr = (indptr, matrix.cols, matrix.vals)
+        return matrix
+
+    def _find(self, row, col):
+        
+        """
+        Returns the array index of the element at (row, col), or -1 if it is not stored.
+        
+        The arrays are sorted by row and column, so their packed keys are sorted too and can be
+        binary searched. The keys are kept from the last sort, or rebuilt lazily after the arrays change.
+        Indices too wide to pack are searched in two steps instead, first for the row and then
+        for the column within that row.
+        """
+        
+        index_dtype = np.result_type(self.rows, self.cols)
+        # Elements outside the declared shape are stored too, but never with an index wider than the arrays
+        if not (0 <= row <= np.iinfo(index_dtype).max and 0 <= col <= np.iinfo(index_dtype).max):
+            return -1
+        if not _fits_packed_keys(index_dtype):
+            start, end = np.searchsorted(self.rows, [row, row + 1])
+            index = start + np.searchsorted(self.cols[start:end], col)
+            return index if index < end and self.cols[index] == col else -1
+        if self._keys is None:
+            self._keys = _pack_keys(self.rows, self.cols)
+        # Shift Python ints, since a NumPy int32 row would overflow before reaching uint64
+        key = np.uint64((int(row) << 32) | int(col))
+        index = np.searchsorted(self._keys, key)
+        return index if index < len(self._keys) and self._keys[index] == key else -1
 
     def set_element(self, row, col, value):
         
         """
         Sets the value of an element in the matrix.
         
+        This is meant for building matrices by hand; load_matrix and the arithmetic methods
+        store their elements in bulk without going through it.
+        As in load_matrix, a position outside the matrix dimensions is stored as well,
+        but takes no part in arithmetic.
+        
         Args:
             row (int): Row index of the element.
             col (int): Column index of the element.
             value (int): Value to be set.
+        
+        Raises:
+            IndexError: If the row or column index is negative.
         """
         
-        if value == 0:
-            return  # Skip zero values
-
-        new_node = Node(row, col, value)
-        if not self.head:
-            self.head = new_node
-            return
+        if row < 0 or col < 0:
+            raise IndexError(f"Element ({row}, {col}) has a negative index.")
+        # Writes are buffered in a dict keyed by position and merged into the sorted arrays by _finalize;
+        # a zero is kept as a marker that deletes any stored element
+        self._pending[(row, col)] = value
 
-        # Insert in order by row and column
-        prev = None
-        current = self.head
-        while current and (current.row < row or (current.row == row and current.col < col)):
-            prev = current
-            current = current.next
+    def _finalize(self):
         
-        if prev:
-            prev.next = new_node
-        else:
-            self.head = new_node
-        new_node.next = current
+        """
+        Merges the elements buffered by set_element into the sorted arrays.
+        
+        The buffered writes are appended after the stored elements and sorted once;
+        _set_arrays keeps the buffered value where a position is stored in both and drops zeros.
+        """
+        
+        if not self._pending:
+            return
+        count = len(self._pending)
+        rows = np.fromiter((key[0] for key in self._pending), dtype=np.int64, count=count)
+        cols = np.fromiter((key[1] for key in self._pending), dtype=np.int64, count=count)
+        # Positions outside the declared shape may need wider indices than the shape alone
+        index_dtype = np.promote_types(np.result_type(self.rows, self.cols),
+                                       _index_dtype(max(self.num_rows, int(rows.max()) + 1),
+                                                    max(self.num_cols, int(cols.max()) + 1)))
+        rows, cols = rows.astype(index_dtype), cols.astype(index_dtype)
+        vals = np.fromiter(self._pending.values(), dtype=np.int64, count=count)
+        self._pending = {}
+        self._set_arrays(np.concatenate([self.rows, rows]),
+                         np.concatenate([self.cols, cols]),
+                         np.concatenate([self.vals, vals]))
 
     def get_element(self, row, col):
         
@@ -113,12 +373,20 @@ class SparseMatrix:
             int: Value of the element, or 0 if not found.
         """
         
-        current = self.head
-        while current:
-            if current.row == row and current.col == col:
-                return current.value
-            current = current.next
-        return 0
+        # Buffered writes are answered directly, so reads between writes do not force a merge
+        if (row, col) in self._pending:
+            return self._pending[(row, col)]
+        index = self._find(row, col)
+        return int(self.vals[index]) if index >= 0 else 0
+
+    def _combine(self, other, sign):
+        
+        """
+        Returns self + sign * other for two matrices of the same shape.
+        """
+        
+        return SparseMatrix._from_csr(*csr_add(*self._as_csr(), *other._as_csr(), sign),
+                                      self.num_rows, self.num_cols)
 
     def add(self, other):
         
@@ -128,19 +396,7 @@ class SparseMatrix:
         
         if self.num_rows != other.num_rows or self.num_cols != other.num_cols:
             raise ValueError("Matrix dimensions must match for addition.")
-        result = SparseMatrix(num_rows=self.num_rows, num_cols=self.num_cols)
-        # Add elements from this matrix
-        current = self.head
-        while current:
-            result.set_element(current.row, current.col, current.value)
-            current = current.next
-        # Add elements from the other matrix
-        current = other.head
-        while current:
-            value = result.get_element(current.row, current.col)
-            result.set_element(current.row, current.col, value + current.value)
-            current = current.next
-        return result
+        return self._combine(other, 1)
 
     def subtract(self, other):
         
@@ -150,18 +406,7 @@ class SparseMatrix:
         
         if self.num_rows != other.num_rows or self.num_cols != other.num_cols:
             raise ValueError("Matrix dimensions must match for subtraction.")
-        result = SparseMatrix(num_rows=self.num_rows, num_cols=self.num_cols)
-        current = self.head
-        while current:
-            result.set_element(current.row, current.col, current.value)
-            current = current.next
-        current = other.head
-        while current:
-            value = result.get_element(current.row, current.col)
-            result.set_element(current.row, current.col, value - current.value)
-            current = current.next
-        # Subtract elements from the other matrix
-        return result
+        return self._combine(other, -1)
 
     def multiply(self, other):
         
@@ -172,18 +417,30 @@ class SparseMatrix:
         if self.num_cols != other.num_rows:
             raise ValueError("Number of columns in first matrix must be equal to the number of rows in second matrix for multiplication.")
         
+        self._finalize()
+        other._finalize()
         result = SparseMatrix(num_rows=self.num_rows, num_cols=other.num_cols)
-        current_self = self.head
-        while current_self:
-            current_other = other.head
-            while current_other:
-                if current_self.col == current_other.row:
-                    existing_value = result.get_element(current_self.row, current_other.col)
-                    result.set_element(current_self.row, current_other.col, 
-                                       existing_value + current_self.value * current_other.value)
-                current_other = current_other.next
-            current_self = current_self.next
-        return result
+        a_rows, a_cols, a_vals = self._in_shape()
+        b_rows, b_cols, b_vals = other._in_shape()
+        if len(a_vals) == 0 or len(b_vals) == 0:
+            return result
+        # A diagonal operand only scales the rows (on the left) or columns (on the right) of the other
+        if np.array_equal(a_rows, a_cols):
+            scale = np.zeros(other.num_rows, dtype=np.int64)
+            scale[a_rows] = a_vals
+            vals = np.multiply(b_vals, scale[b_rows], dtype=np.int64)
+            keep = vals != 0
+            result._set_sorted(b_rows[keep], b_cols[keep], vals[keep])
+            return result
+        if np.array_equal(b_rows, b_cols):
+            scale = np.zeros(self.num_cols, dtype=np.int64)
+            scale[b_rows] = b_vals
+            vals = np.multiply(a_vals, scale[a_cols], dtype=np.int64)
+            keep = vals != 0
+            result._set_sorted(a_rows[keep], a_cols[keep], vals[keep])
+            return result
+        return SparseMatrix._from_csr(*csr_spgemm(*self._as_csr(), *other._as_csr(), other.num_cols),
+                                      self.num_rows, other.num_cols)
 
     def save_to_file(self, output_file_path):
         
@@ -194,13 +451,12 @@ class SparseMatrix:
             output_file_path (str): Path to the output file.
         """
         
+        self._finalize()
         with open(output_file_path, 'w') as file:
             file.write(f"Rows={self.num_rows}\n")
             file.write(f"Cols={self.num_cols}\n")
-            current = self.head
-            while current:
-                file.write(f"({current.row},{current.col},{current.value})\n")
-                current = current.next
+            for text in self._format_elements("(%d,%d,%d)\n"):
+                file.write(text)
 
     def display(self):
         
@@ -208,10 +464,26 @@ class SparseMatrix:
         Displays the matrix elements.
         """
         
-        current = self.head
-        while current:
-            print(f"({current.row}, {current.col}, {current.value})")
-            current = current.next
+        self._finalize()
+        for text in self._format_elements("(%d, %d, %d)\n"):
+            sys.stdout.write(text)
+
+    def _format_elements(self, element_format, block=65536):
+        
+        """
+        Yields the stored elements as text, one block of elements at a time.
+        
+        Each block is formatted with a single %-operation instead of one f-string per element.
+        
+        Args:
+            element_format (str): Format of one element, taking row, column and value.
+            block (int, optional): Number of elements per yielded string.
+        """
+        
+        for start in range(0, len(self.vals), block):
+            end = start + block
+            triples = np.column_stack([self.rows[start:end], self.cols[start:end], self.vals[start:end]])
+            yield element_format * len(triples) % tuple(triples.ravel().tolist())
 
 def main():
     
@@ -226,10 +498,6 @@ def main():
         
         # Load matrices from files
         matrix1.load_matrix('./easy_sample_01_2.txt')
-        
-        with open('./easy_sample_01_2.txt', 'r') as file:
-            print(file.read())
-    
         matrix2.load_matrix('./easy_sample_01_3.txt')
 
         operation = input("Enter operation (add, subtract, multiply): ").strip().lower()
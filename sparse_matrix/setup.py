@@ -0,0 +1,10 @@
+#!/usr/bin/python3
+# Builds the optional compiled kernels next to matrix.py:
+#     python setup.py build_ext --inplace
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+setup(
+    name="sparse_matrix_ops",
+    ext_modules=cythonize([Extension("_sparse_ops", ["_sparse_ops.pyx"])]),
+)
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+# Checks every SpGEMM/add backend against dense NumPy products and sums:
+#     python -m unittest test_kernels
+import importlib.util
+import os
+import sys
+import unittest
+
+import numpy as np
+
+import _kernels
+
+def _load_python_kernels():
+    
+    """
+    Loads a second copy of _kernels with Numba hidden, so its kernels run as plain Python.
+    """
+    
+    saved = sys.modules.get('numba')
+    sys.modules['numba'] = None
+    try:
+        spec = importlib.util.spec_from_file_location(
+            '_kernels_python', os.path.join(os.path.dirname(os.path.abspath(__file__)), '_kernels.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if saved is None:
+            del sys.modules['numba']
+        else:
+            sys.modules['numba'] = saved
+    return module
+
+def _backends():
+    
+    """
+    Returns the (name, module) pairs of every backend available here.
+    """
+    
+    backends = [('python', _load_python_kernels())]
+    if _kernels.NUMBA_AVAILABLE:
+        backends.append(('numba', _kernels))
+    try:
+        import _sparse_ops
+        backends.append(('cython', _sparse_ops))
+    except ImportError:
+        pass
+    return backends
+
+def _to_csr(dense):
+    
+    """
+    Returns the (indptr, indices, data) CSR arrays of a dense matrix, with int32 indices like SparseMatrix.
+    """
+    
+    rows, cols = np.nonzero(dense)
+    indptr = np.zeros(dense.shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=dense.shape[0]), out=indptr[1:])
+    return indptr, cols.astype(np.int32), dense[rows, cols].astype(np.int16)
+
+def _random(rng, shape, density):
+    
+    """
+    Returns a dense integer matrix with about the given fraction of small nonzero entries.
+    """
+    
+    # Values in [-2, 2] make products and sums cancel to zero regularly
+    values = rng.integers(-2, 3, shape)
+    return np.where(rng.random(shape) < density, values, 0)
+
+class KernelTest(unittest.TestCase):
+    
+    """
+    Compares csr_spgemm and csr_add of every backend with dense NumPy results.
+    """
+    
+    def setUp(self):
+        self.backends = _backends()
+        self.rng = np.random.default_rng(7)
+
+    def assert_csr_equal(self, csr, expected):
+        
+        """
+        Asserts that CSR arrays hold exactly the nonzeros of a dense matrix, sorted within every row.
+        """
+        
+        indptr, indices, data = csr
+        self.assertEqual(len(indptr), expected.shape[0] + 1)
+        self.assertFalse(np.any(np.asarray(data) == 0), "explicit zeros are stored")
+        actual = np.zeros(expected.shape, dtype=np.int64)
+        for i in range(expected.shape[0]):
+            row = np.asarray(indices[indptr[i]:indptr[i + 1]])
+            self.assertTrue(np.all(np.diff(row) > 0), f"row {i} is not sorted by column")
+            actual[i, row] = data[indptr[i]:indptr[i + 1]]
+        np.testing.assert_array_equal(actual, expected)
+
+    def check_multiply(self, a, b):
+        for name, module in self.backends:
+            # The tile width only changes how the Numba-style kernels sweep the columns
+            for tile in (1, 3, 8, _kernels.SPGEMM_TILE):
+                with self.subTest(backend=name, tile=tile, shape=(a.shape, b.shape)):
+                    saved = getattr(module, 'SPGEMM_TILE', None)
+                    if saved is not None:
+                        module.SPGEMM_TILE = tile
+                    try:
+                        csr = module.csr_spgemm(*_to_csr(a), *_to_csr(b), b.shape[1])
+                    finally:
+                        if saved is not None:
+                            module.SPGEMM_TILE = saved
+                    self.assert_csr_equal(csr, a @ b)
+
+    def check_combine(self, a, b):
+        for name, module in self.backends:
+            for sign in (1, -1):
+                with self.subTest(backend=name, sign=sign, shape=a.shape):
+                    self.assert_csr_equal(module.csr_add(*_to_csr(a), *_to_csr(b), sign), a + sign * b)
+
+    def test_multiply_random(self):
+        for density in (0.05, 0.3, 0.9):
+            self.check_multiply(_random(self.rng, (23, 31), density), _random(self.rng, (31, 19), density))
+
+    def test_multiply_cancellation(self):
+        # Every product entry cancels, so the symbolic pass overestimates every row
+        a = np.array([[1, 1], [2, 2], [0, 3]])
+        b = np.array([[1, 0, 2, -5], [-1, 0, -2, 5]])
+        self.check_multiply(a, b)
+        self.check_multiply(np.hstack([a, a]), np.vstack([b, -b]))
+
+    def test_multiply_empty(self):
+        self.check_multiply(np.zeros((5, 6), dtype=np.int64), _random(self.rng, (6, 4), 0.5))
+        self.check_multiply(_random(self.rng, (5, 6), 0.5), np.zeros((6, 4), dtype=np.int64))
+        self.check_multiply(np.zeros((0, 3), dtype=np.int64), np.zeros((3, 0), dtype=np.int64))
+
+    def test_multiply_diagonal(self):
+        diagonal = np.diag(self.rng.integers(-3, 4, 12))
+        other = _random(self.rng, (12, 12), 0.4)
+        self.check_multiply(diagonal, other)
+        self.check_multiply(other, diagonal)
+
+    def test_combine_random(self):
+        for density in (0.05, 0.3, 0.9):
+            self.check_combine(_random(self.rng, (17, 29), density), _random(self.rng, (17, 29), density))
+
+    def test_combine_cancellation(self):
+        a = _random(self.rng, (9, 13), 0.5)
+        self.check_combine(a, a)
+        self.check_combine(a, -a)
+
+    def test_combine_empty(self):
+        empty = np.zeros((6, 8), dtype=np.int64)
+        self.check_combine(empty, _random(self.rng, (6, 8), 0.5))
+        self.check_combine(_random(self.rng, (6, 8), 0.5), empty)
+        self.check_combine(empty, empty)
+
+if __name__ == "__main__":
+    unittest.main()